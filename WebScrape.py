@@ -5,21 +5,47 @@
 # benchmarking
 import time
 
-# multi-threading
+# profiling
+import tracemalloc
+import collections
+
+# multi-threading and multi-processing
 import concurrent.futures
+import threading
+import queue
+import itertools
 from multiprocessing import freeze_support
 
 # file handling
 import sys
 import os
+import io
 import csv
+import locale
+import json
+import shutil
+
+# content hashing
+import hashlib
+
+# library file
+import sqlite3
 
-# regular expressions
+# episode index
+import array
+import mmap
+import bisect
+import datetime
+import contextlib
+
+# regular expressions and url encoding
 import re
+import urllib.parse
 
-# scraping
-import requests
-from bs4 import BeautifulSoup
+# scraping (slow to import so imported in background on start up, see importScrapingLibraries())
+requests = None
+BeautifulSoup = None
+httpx = None    # optional library for HTTP/2 transport
 
 
 # user agent for browser visit (Source: useragentstring.com)
@@ -27,6 +53,16 @@ user_agent = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:94.0) Gecko/20100101 Firefox/94.0'
     }
 
+# Retry parameters for requests
+RETRY_TOTAL = 3                                 # total retries for each request
+RETRY_BACKOFF = 1                               # sleep parameter between retries
+RETRY_STATUS = [429, 500, 502, 503, 504]        # "Too Many Requests" error (429) and common server errors (500/2/3/4)
+
+# Transport for https requests (HTTP/2 if optional httpx library is installed with http2 support, otherwise HTTP/1.1)
+USE_HTTP2 = True
+HTTP2_CONNECTIONS = 3               # number of HTTP/2 connections to each host shared by all threads
+BENCHMARK_TRANSPORT = False         # compare HTTP/1.1 and HTTP/2 transports with search urls before scraping
+
 # Database to scrape from
 IMDB = {
     "Name": "IMDb",                                     # name of database
@@ -39,6 +75,9 @@ IMDB = {
     
     "TV Root": "https://www.imdb.com/title/",           # root of media page url
     "TV Episodes": "/episodes?season=",                 # root of media episodes query
+
+    "Hosts": ["https://www.imdb.com/",                  # hosts to check connection to before scraping
+              "https://m.media-amazon.com/"],
     }
 
 # Default Search database
@@ -47,6 +86,120 @@ DEFAULT_DATABASE = IMDB
 # Default Save directory
 SAVE_FOLDER_NAME = "ScrapedData"
 
+# Poster store directory (within save directory) holding a single copy of each poster image
+POSTER_STORE_NAME = ".posters"
+POSTER_INDEX_NAME = "index.csv"     # maps each poster url to the content hash of its image
+POSTER_ADOPTED_NAME = "adopted.csv" # content hash of existing poster images which could not be linked to the poster store
+
+# Library file (within save directory) storing all scraped data in a single file
+LIBRARY_NAME = "library.db"
+LIBRARY_BATCH_SIZE = 500            # number of rows written to library file in each transaction
+
+# Episode index directory (within save directory) storing typed episode information for all media in columns
+EPISODE_INDEX_NAME = ".episode_index"
+EPISODE_INDEX_COLUMNS = {           # file name (key) and array type code (value) for each column
+    "show": 'i',        # numeric part of database ID of media
+    "season": 'h',      # season number (-1 if unknown)
+    "episode": 'h',     # episode number (-1 if unknown)
+    "date": 'i',        # air date as proleptic Gregorian ordinal (0 if unknown)
+    "title": 'q',       # end offset of episode title in titles file
+    }
+EPISODE_INDEX_MAX_NUMBER = 2 ** 15 - 1   # largest season or episode number stored (larger numbers are stored as unknown)
+EPISODE_INDEX_TITLES = "titles.txt"     # episode titles (utf-8) stored one after another
+EPISODE_INDEX_SHOWS = "shows.csv"       # lookup of first row and number of rows for each media
+EPISODE_INDEX_DATE_ROWS = "date_rows"   # lookup of rows sorted by air date
+EPISODE_INDEX_DATE_KEYS = "date_keys"   # air date of each row in date rows lookup
+
+# Formats of episode air dates in database (full date, month only, year only)
+EPISODE_DATE_PATTERN = re.compile(r"^(?:(\d{1,2}) )?(?:([A-Za-z]{3})[a-z]*\.? )?(\d{4})$")
+MONTHS = {"jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+          "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12}
+EPISODE_QUERY_DAYS = 7              # number of days before today shown when querying episodes aired from episode index
+
+# Verbosity of output while scraping
+VERBOSITY_PROGRESS = 0              # only output live progress
+VERBOSITY_ERRORS = 1                # also output unsuccessful scrapes and missing data for each media
+VERBOSITY_ALL = 2                   # also output every step of the scrape for each media
+VERBOSITY = VERBOSITY_ERRORS
+
+# Event log (within save directory) storing every event while scraping as JSON lines
+SAVE_EVENT_LOG = False
+EVENT_LOG_NAME = "events.jsonl"
+
+PROGRESS_INTERVAL = 0.5             # seconds between updates of live progress
+
+# Verbosity needed to output an event message (value) for each event status (key)
+EVENT_VERBOSITY = {
+    "stage": VERBOSITY_PROGRESS,    # start of a stage of the scrape
+    "info": VERBOSITY_ALL,          # step of the scrape for a media
+    "warning": VERBOSITY_ERRORS,    # error which does not stop the scrape for a media
+    "present": VERBOSITY_ALL,       # data already scraped for a media
+    "done": VERBOSITY_ALL,          # successful scrape for a media
+    "missing": VERBOSITY_ERRORS,    # no data found for a media
+    "failed": VERBOSITY_ERRORS,     # unsuccessful scrape for a media
+    }
+FINISHED_EVENTS = ["present", "done", "missing", "failed"]  # event statuses which finish the scrape for a media
+
+# Profiling (saves CPU and memory allocation reports for each stage of scrape to profile folder within save directory)
+PROFILE_SCRAPE = False
+PROFILE_FOLDER_NAME = "Profile"
+PROFILE_INTERVAL = 0.01             # seconds between samples of each thread's stack
+PROFILE_TOP = 20                    # number of functions and allocation sites output for each stage
+PROFILE_SNAPSHOT_INTERVAL = 1.0     # seconds between memory snapshots used to find allocation sites for each stage
+
+# Verification of existing scraped data
+VERIFY_MIN_IMAGE_SIZE = 1024        # smallest valid poster image (bytes)
+JPEG_START = b'\xff\xd8\xff'        # signature at start of a jpg image
+JPEG_END = b'\xff\xd9'              # marker at end of a jpg image
+PNG_START = b'\x89PNG\r\n\x1a\n'    # signature at start of a png image
+PNG_END = b'IEND\xaeB`\x82'          # chunk at end of a png image
+ID_PATTERN = re.compile(r"^tt\d{7,}$")                 # format of a database ID
+POSTER_URL_PATTERN = re.compile(r"^https?://\S+\.jpg$")  # format of a poster url
+
+# Scrape history (within save directory) storing the time taken and size of each media's previous scrapes
+HISTORY_NAME = "history.csv"
+HISTORY_FIELDS = ["Media", "Priority", "Seasons", "Poster bytes", "Info seconds", "Episodes seconds", "Images seconds"]
+DEFAULT_COST = 1.0                  # estimated seconds for a stage with no history
+
+# Patterns for normalizing media names (compiled once and shared by all media)
+BRACKETS_PATTERN = re.compile(r"[\(\[].*?[\)\]]")            # text in parentheses or brackets
+INVALID_CHARACTERS_PATTERN = re.compile(r'[\/:*?"<>|]')      # characters invalid in file names
+RELEASE_SOURCE_TAGS = r"\d{3,4}p|bluray|blu-ray|bdrip|brrip|dvdrip|webrip|web-dl|webdl|hdtv|x264|x265|h264|h265|hevc|xvid"   # tags only used in release names
+RELEASE_OTHER_TAGS = r"4k|uhd|hdr|remux|proper|repack|extended|unrated|10bit|aac|ac3|dts"   # tags also used as words in titles
+RELEASE_TAGS_PATTERN = re.compile(      # release tags at end of name (from first source tag, or a chain of other tags after a year)
+    rf"[\s._(\[-]+(?:(?:{RELEASE_OTHER_TAGS})[\s._()\[\]-]+)*(?:{RELEASE_SOURCE_TAGS})(?:[\s._()\[\]-].*)?$"
+    rf"|(?:(?<=\b(?:19|20)\d\d)|(?<=\b(?:19|20)\d\d[)\]]))[\s._(\[-]+(?:{RELEASE_OTHER_TAGS})"
+    rf"(?:[\s._()\[\]-]+(?:{RELEASE_SOURCE_TAGS}|{RELEASE_OTHER_TAGS}))*(?:-\w+)?[\s.)\]]*$", re.IGNORECASE)
+SEPARATORS_PATTERN = re.compile(r"[._]+")                   # dots or underscores used instead of spaces in release names
+APOSTROPHES_PATTERN = re.compile(r"['\u2019]")               # apostrophes removed from canonical keys
+PUNCTUATION_PATTERN = re.compile(r"[\W_]+")                  # punctuation and spaces replaced in canonical keys
+
+# Title index (within save directory) storing the database ID and media name scraped for each canonical key
+TITLE_INDEX_NAME = "titles.csv"
+TITLE_INDEX_FIELDS = ["Key", "Database ID", "Media"]
+
+# Number of threads scraping media (same as default for ThreadPoolExecutor)
+WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+# Fields saved for media information (in order saved to text file)
+INFO_FIELDS = ["Scraped from", "Database ID", "Title", "Release date", "Runtime",
+               "Genre", "Director", "Cast", "Plot summary", "Poster link"]
+
+# Fields saved for episode information (in order saved to csv file)
+EPISODE_FIELDS = ["Season", "Episode", "Title", "Date", "Description"]
+
+# Tables in library file
+LIBRARY_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS info (media TEXT PRIMARY KEY, scraped_from TEXT, database_id TEXT, title TEXT,
+    release_date TEXT, runtime TEXT, genre TEXT, director TEXT, cast_members TEXT, plot_summary TEXT, poster_link TEXT);
+CREATE TABLE IF NOT EXISTS episode_lists (media TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS episodes (media TEXT, season TEXT, episode TEXT, title TEXT, date TEXT, description TEXT);
+CREATE INDEX IF NOT EXISTS episodes_media ON episodes (media);
+CREATE TABLE IF NOT EXISTS posters (hash TEXT PRIMARY KEY, image BLOB);
+CREATE TABLE IF NOT EXISTS media_posters (media TEXT PRIMARY KEY, hash TEXT);
+CREATE TABLE IF NOT EXISTS poster_urls (url TEXT PRIMARY KEY, hash TEXT);
+'''
+
 if getattr(sys, 'frozen', False):
     # program location if running code from frozen exe
     DEFAULT_PATH = os.path.dirname(sys.executable)
@@ -62,16 +215,100 @@ infoScraped = {}      # stores True, False, None (value) to indicate status of i
 imagesScraped = {}    # stores True, False, None (value) to indicate status of image scrape for each media (key)
 episodesScraped = {}  # stores True, False, None (value) to indicate status of episodes scrape for each media (key)
 
+# Initialise hash tables for poster store
+posterHashes = {}     # stores content hash (value) of stored poster image for each poster url (key)
+posterLocks = {}      # stores lock (value) held while downloading each poster url (key)
+posterAdopted = {}    # stores [size, modified time, content hash] (value) for each poster image not linked to poster store (key)
+posterStoreLock = threading.Lock()  # lock for updating poster store hash tables from multiple threads
+
+# Initialise hash tables for library file
+useLibrary = False    # bool value to determine if scraped data is saved to library file (set by setLibraryStore())
+libraryInfo = {}      # stores [database ID, poster url] (value) for media information in library file for each media (key)
+libraryEpisodes = set()   # stores media with episode information in library file
+libraryPosters = set()    # stores media with a poster in library file
+libraryHashes = set()     # stores content hash of each poster image in library file
+libraryRows = {}      # stores list of rows (value) waiting to be written for each library table (key)
+libraryLock = threading.Lock()  # lock for writing to library file from multiple threads
+
+# Initialise hash tables for episode index
+episodeIndexShows = {}    # stores [first row, number of rows] (value) in episode index for each show ID (key)
+episodeIndexLock = threading.Lock()     # lock for appending to episode index from multiple threads
+
+# Initialise hash tables for profiler
+profileStages = {}    # stores stage (value) being run by each thread ID (key)
+profileSamples = {}   # stores count of samples (value) for each stack (key) for each stage (key)
+profileTimes = {}     # stores [media, wall time, CPU time] (value) for each stage (key)
+profileMemory = {}    # stores [bytes allocated, peak traced bytes] (value) while each stage (key) is running
+profileSites = {}     # stores bytes allocated (value) at each allocation site (key) for each stage (key)
+profileLock = threading.Lock()  # lock for updating profile times from multiple threads
+
+# Initialise hash tables for scrape history
+historyList = {}      # stores dictionary of history fields (value) for each media (key)
+historyLock = threading.Lock()  # lock for updating scrape history from multiple threads
+
+# Initialise hash tables for title index
+titleIndex = {}       # stores [database ID, media] (value) for each canonical key (key)
+titleIndexLock = threading.Lock()   # lock for updating title index from multiple threads
+
+# Initialise requests sessions
+threadSessions = threading.local()  # stores requests session for each thread
+sessionAdapter = None     # connection pool shared by all sessions (created on first use)
+http2Adapter = None       # HTTP/2 connections shared by all sessions (created on first use if available)
+importLock = threading.Lock()   # lock for importing scraping libraries and creating connection pool
+importTime = None         # seconds taken to import scraping libraries
+firstRequestTime = None   # time first request was sent for scrape
+
+# Initialise event bus
+eventQueue = queue.SimpleQueue()    # stores events [time, stage, media, status, message] waiting to be output
+eventThread = None    # thread which outputs events (None if event bus not running)
+
 ####################################################################################################
 
 def main():
+    global firstRequestTime
 
     # setup
     mediaList = generateMediaList()
-    if len(mediaList) > 0:
+
+    # Determine if existing scraped data will be verified
+    verifyQuestion = "Verify existing scraped data in save folder (rescrape any broken files)?"
+    verify = askUserBool(verifyQuestion)
+
+    if len(mediaList) > 0 or verify:
         createSaveFolder()
-    else:
+
+        # add media with broken files to media list
+        if verify:
+            brokenMedia = verifySaveFolder()
+            mediaList.extend(media for media in brokenMedia if media not in mediaList)
+
+        setLibraryStore()
+        loadHistory()
+        loadTitleIndex()
+
+    if len(mediaList) == 0:
         print("Empty media list.")
+        saveFolderCreated = verify  # save folder already created for verification
+
+        # Show episodes from existing episode index without scraping
+        queryQuestion = f"Show episodes aired in the last {EPISODE_QUERY_DAYS} days from an existing episode index?"
+        if askUserBool(queryQuestion):
+            if not saveFolderCreated:
+                createSaveFolder()
+                saveFolderCreated = True
+            showEpisodesAired(SAVE_FOLDER)
+
+        # Export existing library file without scraping (already offered below if library file used for verification)
+        exportQuestion = "Export an existing library file to separate files for each media?"
+        if not useLibrary and askUserBool(exportQuestion):
+            if not saveFolderCreated:
+                createSaveFolder()
+            if os.path.exists(os.path.join(SAVE_FOLDER, LIBRARY_NAME)):
+                loadLibrary()
+                exportLibrary(SAVE_FOLDER)
+                libraryConnection.close()
+            else:
+                print("\nNo library file found in '" + SAVE_FOLDER + "'")
 
     # main while loop
     while len(mediaList) > 0:
@@ -84,27 +321,53 @@ def main():
         # set base search url
         setSearchDatabase()
 
-        # test internet connection
-        internetConnection = testInternetConnection()
+        # compare transports using search url for each media
+        if BENCHMARK_TRANSPORT:
+            benchmarkTransport([DATABASE_SEARCH + getSearchQuery(media) for media in mediaList])
+
+        # start outputting progress for each stage of scrape
+        stageTotals = {"info": len(mediaList), "episodes": len(mediaList) if scrapeTV else 0, "images": len(mediaList)}
+        startEventBus(stageTotals)
+
+        # start profiling each stage of scrape
+        if PROFILE_SCRAPE: startProfiler()
+
+        # scrape media information, episode information (if specified) and images
+        if scrapeTV: postEvent(None, None, "stage", f"\n\n{'-'*20} Retrieving media info, episodes and images . . . {'-'*6}")
+        else: postEvent(None, None, "stage", f"\n\n{'-'*20} Retrieving media information and images . . . {'-'*9}")
+        saveStartTime = time.perf_counter()
+        firstRequestTime = None
+        internetConnection, stageTimes = scheduleScrape(mediaList)
+
+        # ask user to retry connection
         if internetConnection is False:
+            stopEventBus()
+            if PROFILE_SCRAPE: stopProfiler()
+            print("\nNo connection.")
+            connectQuestion = "Check internet connection and retry?"
+            connect = askUserBool(connectQuestion)
+            if connect is True:
+                continue
             break
-        
-        # save media information
-        print(f"\n\n{'-'*20} Retrieving media information . . . {'-'*20}")
-        saveStartTime = time.perf_counter()
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            executor.map(save_info, mediaList)  # multithread save_info()
-        saveEndTime = time.perf_counter()
-        
-        # download images and save episode information
-        if scrapeTV: print(f"\n\n{'-'*20} Retrieving media episodes and images . . . {'-'*12}")
-        else: print(f"\n\n{'-'*20} Retrieving media images . . . {'-'*25}")
-        downloadStartTime = time.perf_counter()
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            if scrapeTV: executor.map(save_info_episodes, mediaList)    # multithread save_info_episodes()
-            executor.map(download_images, mediaList)    # multithread download_images()
+
+        if useLibrary: flushLibrary()   # write remaining scraped data to library file
+        if scrapeTV and useEpisodeIndex: saveEpisodeIndex()     # update episode index lookups
+        saveEndTime = stageTimes.get("info", [saveStartTime, saveStartTime])[1]
+        # later stages are not run if every information scrape raised an error
+        downloadStartTime = min((stageTimes[stage][0] for stage in stageTimes if stage != "info"), default = saveEndTime)
         downloadEndTime = time.perf_counter()
 
+        # stop outputting progress once all events are output
+        stopEventBus()
+
+        # save profile reports for each stage
+        if PROFILE_SCRAPE: stopProfiler()
+
+        # save index of downloaded poster urls and scrape history for future scrapes
+        if not useLibrary: savePosterStore()
+        saveHistory()
+        saveTitleIndex()
+
         # initialise lists to hold all media with unsuccessful scrapes or missing data
         unscrapedMedia = []
         missingMedia = []
@@ -143,6 +406,7 @@ def main():
 Finished scraping in {(downloadEndTime - saveStartTime):.2f} seconds
     Retrieved media information in {(saveEndTime - saveStartTime):.2f} seconds
     Retrieved media images and episode data (if specified) in {(downloadEndTime - downloadStartTime):.2f} seconds
+    Sent first request in {(firstRequestTime - saveStartTime):.2f} seconds (scraping libraries loaded in {importTime:.2f} seconds)
 \nScraped {len(mediaList) - len(unscrapedMedia) - len(missingMedia)} out of {len(mediaList)} media:
     {len(unscrapedMedia)} unsuccessful scrapes (error encountered when retrieving url)
     {len(missingMedia)} missing data (search yielded no results)
@@ -177,6 +441,13 @@ Finished scraping in {(downloadEndTime - saveStartTime):.2f} seconds
         else:
             break
 
+    # ask user to export library file to separate files
+    if useLibrary:
+        exportQuestion = "Export library file to separate files for each media?"
+        if askUserBool(exportQuestion):
+            exportLibrary(SAVE_FOLDER)
+        libraryConnection.close()
+
     print("\n\nDone.")
         
 ####################################################################################################
@@ -196,20 +467,20 @@ def generateMediaList():
         sourceFolderRequest = "Enter the folder path to generate media list"
         SOURCE_FOLDER = askUserPath(sourceFolderRequest)
 
-        # create media list from subfolder names
-        folderMedia = os.listdir(SOURCE_FOLDER)
-        for i, media in enumerate(folderMedia):
-            folderMedia[i] = os.path.splitext(media)[0]                             # remove any file extensions
-            folderMedia[i] = re.sub("[\(\[].*?[\)\]]", "", folderMedia[i]).strip()  # remove any parentheses
-        mediaList.extend(folderMedia)
+        # create media list from subfolder and file names
+        for media in os.listdir(SOURCE_FOLDER):
+            if os.path.isfile(os.path.join(SOURCE_FOLDER, media)):
+                media = os.path.splitext(media)[0]                  # remove any file extensions
+            media = normalizeMediaName(media, removeBrackets = True)   # remove any parentheses
+            if media and media not in mediaList:
+                mediaList.append(media)
 
     # Generate media list from user input
     else:
         # input a single media name to add to media list
         newMedia = str(input("\nEnter a Movie or TV show: "))
         while len(newMedia.strip()) > 0:
-            newMedia = newMedia.replace(':', ' -')                   # replace invalid ':' common in titles
-            newMedia = re.sub(r'[\/:*?"<>|]', ' ', newMedia).strip() # remove any invalid characters
+            newMedia = normalizeMediaName(newMedia)
             if newMedia:
                 # add to media list if not an empty string after removing invalid characters
                 mediaList.append(newMedia)
@@ -244,14 +515,31 @@ def createSaveFolder():
     else:
         print("Using existing save folder '" + SAVE_FOLDER_NAME + "' located at '" + SAVE_FOLDER + "'\n")
 
+def setLibraryStore():
+    '''Set whether scraped data is saved to a single library file or to separate files for each media'''
+    global useLibrary
+
+    # Determine if scraped data will be saved to library file
+    libraryQuestion = "Save scraped data to a single library file (faster for large media lists and network drives)?"
+    useLibrary = askUserBool(libraryQuestion)
+
+    if useLibrary:
+        loadLibrary()
+        print("Saving scraped data to library file '" + LIBRARY_NAME + "'\n")
+    else:
+        loadPosterStore()
+        print("Saving scraped data to separate files\n")
+
 def setSearchDatabase():
     '''Set base search database with additional user specified tags based on type of media to be scraped'''
     global DATABASE_SEARCH
     global DATABASE
     global scrapeTV
+    global useEpisodeIndex
 
     DATABASE = IMDB     # TODO add user option to change this once code supports more databases
     scrapeTV = False    # bool value to determine if TV episode information will be scraped
+    useEpisodeIndex = False     # bool value to determine if TV episode information will be added to episode index
     
     # Determine if there are additional tags for media list search
     specifySearchQuestion = "Specify type of media being scraped (more accurate scrapes)?"
@@ -271,7 +559,15 @@ def setSearchDatabase():
             # determine whether to scrape episode data
             episodeQuestion = "Do you want to scrape information for each TV episode?"
             scrapeTV = askUserBool(episodeQuestion)
-            if scrapeTV: print("Scraping for TV episodes")
+            if scrapeTV:
+                print("Scraping for TV episodes")
+
+                # determine whether to add episode data to episode index
+                episodeIndexQuestion = "Do you want to add TV episodes to the episode index (fast queries across all media)?"
+                useEpisodeIndex = askUserBool(episodeIndexQuestion)
+                if useEpisodeIndex:
+                    loadEpisodeIndex(SAVE_FOLDER)
+                    print("Adding TV episodes to episode index")
         else:
             print("Scraping for Movies")
             tags.append(DATABASE["Movie"])  # search with movies tag
@@ -295,51 +591,808 @@ def setSearchDatabase():
 
     print(f"\nSearching {DATABASE['Name']} with root url:\n{DATABASE_SEARCH}\n")
 
+####################################################################################################
+### Functions for media names ###
+
+def normalizeMediaName(name, removeBrackets = False):
+    '''Cleans a media name used for searching and saving files
+    Removes release tags, invalid characters and optionally text in parentheses or brackets
+    Dots and underscores separating words of release names are replaced by spaces
+    '''
+    name = RELEASE_TAGS_PATTERN.sub("", name.strip())
+    if removeBrackets:
+        name = BRACKETS_PATTERN.sub("", name)
+    if " " not in name.strip():
+        name = SEPARATORS_PATTERN.sub(" ", name)    # dots kept in titles with spaces e.g. 'Mr. Robot'
+    name = name.replace('_', ' ')
+    name = name.replace(':', ' -')                  # replace invalid ':' common in titles
+    return INVALID_CHARACTERS_PATTERN.sub(' ', name).strip()
+
+def getCanonicalKey(media):
+    '''Gets the canonical key of a media name (same key for names differing only in case, punctuation or release tags)
+    Years are kept in the key as they are also used in the search
+    '''
+    key = RELEASE_TAGS_PATTERN.sub("", media.replace('&', ' and '))
+    key = APOSTROPHES_PATTERN.sub("", key)
+    return PUNCTUATION_PATTERN.sub(" ", key).strip().casefold()
+
+def getSearchQuery(media):
+    '''Gets a media name encoded for a search url'''
+    return urllib.parse.quote_plus(media)
+
+def getKnownMedia(media):
+    '''Gets the name a media was previously scraped with if it was renamed or re-tagged (None if not previously scraped)'''
+    with titleIndexLock:
+        known = titleIndex.get(getCanonicalKey(media))
+    if known is None or known[1] == media:
+        return None
+    return known[1]
+
+def recordTitle(media, mediaID):
+    '''Records the database ID scraped for a media in the title index'''
+    if not isValidID(mediaID):
+        return
+    with titleIndexLock:
+        titleIndex[getCanonicalKey(media)] = [mediaID, media]
+
+def loadTitleIndex():
+    '''Loads the title index of media already scraped from the save folder'''
+    titleIndex.clear()
+    try:
+        with open(os.path.join(SAVE_FOLDER, TITLE_INDEX_NAME), newline = '') as file:
+            for row in csv.DictReader(file):
+                if isValidID(row["Database ID"]):
+                    titleIndex[row["Key"]] = [row["Database ID"], row["Media"]]
+    except OSError as error:
+        #print(error)    # for debug only
+        backfillTitleIndex()    # no title index saved yet
+    except KeyError as error:
+        #print(error)    # for debug only
+        pass    # title index not in expected format
+
+def backfillTitleIndex():
+    '''Adds media already scraped to the title index from the library file or text files in the save folder
+    Used when no title index has been saved yet, so media saved before the title index are not searched again
+    '''
+    # Add media from library file
+    if useLibrary:
+        for media, (mediaID, mediaPoster) in libraryInfo.items():
+            if mediaID != "Unknown" and isValidID(mediaID):
+                titleIndex[getCanonicalKey(media)] = [mediaID, media]
+        return
+
+    # Add media from text files saved by the scraper
+    for fileName in os.listdir(SAVE_FOLDER):
+        if not fileName.endswith(".txt"):
+            continue
+        try:
+            with open(os.path.join(SAVE_FOLDER, fileName)) as file:
+                lines = [file.readline(), file.readline()]
+        except (OSError, ValueError) as error:
+            #print(error)    # for debug only
+            continue
+        if not lines[0].startswith(INFO_FIELDS[0] + ": ") or not lines[1].startswith(INFO_FIELDS[1] + ": "):
+            continue    # not a text file saved by the scraper
+        mediaID = lines[1].replace(INFO_FIELDS[1] + ": ", "").strip()
+        if mediaID != "Unknown" and isValidID(mediaID):
+            media = fileName[:-len(".txt")]
+            titleIndex[getCanonicalKey(media)] = [mediaID, media]
+
+def saveTitleIndex():
+    '''Saves the title index of media already scraped to the save folder'''
+    titleIndexName = os.path.join(SAVE_FOLDER, TITLE_INDEX_NAME)
+    try:
+        # write to a temporary file first so an interrupted save does not corrupt the title index
+        with open(titleIndexName + ".tmp", 'w', newline = '') as file:
+            csv_writer = csv.writer(file)
+            csv_writer.writerow(TITLE_INDEX_FIELDS)
+            with titleIndexLock:
+                for key, (mediaID, media) in titleIndex.items():
+                    csv_writer.writerow([key, mediaID, media])
+        os.replace(titleIndexName + ".tmp", titleIndexName)
+    except OSError as error:
+        #print(error)    # for debug only
+        print("Could not save title index")
+
+def copyInfo(knownMedia, media, textName):
+    '''Copies information already scraped for a renamed or re-tagged media to the new media name
+    Returns True if copied (False if information for the previous name no longer exists)
+    '''
+    # Copy information in library file
+    if useLibrary:
+        with libraryLock:
+            try:
+                row = libraryConnection.execute("SELECT * FROM info WHERE media = ?", (knownMedia,)).fetchone()
+            except sqlite3.Error as error:
+                #print(error)    # for debug only
+                row = None
+        if row is None:
+            return False
+        addLibraryRows({"info": [[media] + list(row[1:])]})
+        libraryInfo[media] = [row[2], row[-1]]
+        idList[media] = row[2]          # add database id for media to id cache
+        posterList[media] = row[-1]     # add poster url for media to poster cache
+        return True
+
+    # Copy text file
+    try:
+        shutil.copyfile(os.path.join(SAVE_FOLDER, knownMedia + ".txt"), textName)
+    except OSError as error:
+        #print(error)    # for debug only
+        return False
+    posterList[media] = True    # add placeholder to poster cache to indicate possible url in text file
+    idList[media] = True        # add placeholder to id cache to indicate possible id in text file
+    return True
+
 ####################################################################################################
 ### Functions for internet connection ###
     
+def importScrapingLibraries():
+    '''Imports libraries used for scraping
+    Started in the background on start up and waited for by the first session
+    '''
+    global requests
+    global BeautifulSoup
+    global importTime
+
+    with importLock:
+        # check if already imported
+        if requests is not None:
+            return
+
+        importStartTime = time.perf_counter()
+        from bs4 import BeautifulSoup
+        import requests
+        importTime = time.perf_counter() - importStartTime
+
+        # import optional HTTP/2 transport
+        if USE_HTTP2:
+            importHttp2()
+
+def importHttp2():
+    '''Imports optional httpx library for HTTP/2 transport (httpx is left as None if not installed with http2 support)'''
+    global httpx
+    try:
+        import h2
+        import httpx
+    except ImportError as error:
+        #print(error)    # for debug only
+        pass    # use HTTP/1.1 transport
+
 def startSession():
-    '''Creates a requests session for browser visit'''    
+    '''Gets a requests session for browser visit
+    A session is created for each thread (sessions are not thread safe) and kept open for reuse
+    All sessions share a single connection pool so connections are reused between threads
+    '''
+    global sessionAdapter
+    global http2Adapter
+
+    # check for existing session for this thread
+    session = getattr(threadSessions, "session", None)
+    if session is not None:
+        return session
+
+    # wait for scraping libraries to be imported
+    importScrapingLibraries()
+
     session = requests.Session()
 
-    # set user agent for all requests from this session
-    session.headers = user_agent
+    # set user agent and accepted compression (brotli if supported, gzip, deflate) for all requests from this session
+    session.headers = getSessionHeaders()
+
+    with importLock:
+        if sessionAdapter is None:
+            # create adapter with retry parameters and a connection pool large enough for all threads
+            sessionAdapter = createHttp1Adapter()
 
-    # retry parameter (total): set total retries to 3
-    # retry parameter (backoff_factor): set sleep parameter between retries to 1
-    # retry parameter (status_forcelist): force retry on "Too Many Requests" error (429) and common server errors (500/2/3/4)
-    retry = requests.packages.urllib3.util.retry.Retry(total = 3, backoff_factor = 1, status_forcelist = [429, 500, 502, 503, 504])
+        if http2Adapter is None and httpx is not None:
+            # create adapter with a few HTTP/2 connections to each host
+            http2Adapter = Http2Adapter()
 
-    # mount adapter with retry parameters for http and https
-    adapter = requests.adapters.HTTPAdapter(max_retries = retry)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
+    # mount shared adapters for http and https (HTTP/2 for https if available)
+    session.mount('http://', sessionAdapter)
+    session.mount('https://', http2Adapter if http2Adapter is not None else sessionAdapter)
 
+    threadSessions.session = session
     return session
-    
-def testInternetConnection():
-    '''Tests internet connection and returns True or False depending on connection status'''
-    ip = None
-    while ip is None:
+
+def getSessionHeaders():
+    '''Gets headers for all requests (user agent and compression supported by installed libraries)'''
+    headers = dict(user_agent)
+    headers['Accept-Encoding'] = requests.utils.DEFAULT_ACCEPT_ENCODING
+    return headers
+
+def createHttp1Adapter():
+    '''Creates an HTTP/1.1 adapter with retry parameters and a connection pool large enough for all threads'''
+    # retry parameter (total): set total retries
+    # retry parameter (backoff_factor): set sleep parameter between retries
+    # retry parameter (status_forcelist): force retry on "Too Many Requests" error and common server errors
+    retry = requests.packages.urllib3.util.retry.Retry(total = RETRY_TOTAL, backoff_factor = RETRY_BACKOFF, status_forcelist = RETRY_STATUS)
+
+    return requests.adapters.HTTPAdapter(max_retries = retry, pool_maxsize = WORKERS)
+
+class Http2Adapter:
+    '''Transport adapter for requests sessions which sends requests over HTTP/2 using httpx
+    Requests from all threads are multiplexed over a few connections to each host
+    Uses the same retry parameters as the HTTP/1.1 adapter (including Retry-After headers) and raises the same requests exceptions
+    '''
+    def __init__(self):
+        self.clients = [httpx.Client(http2 = True) for i in range(HTTP2_CONNECTIONS)]
+        self.nextClient = itertools.count()
+        self.retry = requests.packages.urllib3.util.retry.Retry()  # used to read Retry-After headers
+
+    def send(self, request, stream = False, timeout = None, verify = True, cert = None, proxies = None):
+        '''Sends a prepared request and returns a requests response'''
+        # spread requests between connections
+        client = self.clients[next(self.nextClient) % len(self.clients)]
+
+        retryAfter = None   # seconds to wait before retry requested by server
+        for retries in range(RETRY_TOTAL + 1):
+            # sleep between retries (same backoff as HTTP/1.1 adapter, no sleep before first retry unless requested by server)
+            if retryAfter is not None:
+                time.sleep(retryAfter)
+            elif retries > 1:
+                time.sleep(RETRY_BACKOFF * 2 ** (retries - 1))
+            retryAfter = None
+
+            # Send request (connection and timeout errors are retried, other errors raised as requests exceptions)
+            try:
+                response = client.request(request.method, request.url, headers = request.headers, content = request.body, timeout = timeout)
+            except httpx.ConnectTimeout as error:
+                lastError = requests.exceptions.ConnectTimeout(error, request = request)
+                continue
+            except httpx.TimeoutException as error:
+                lastError = requests.exceptions.ReadTimeout(error, request = request)
+                continue
+            except httpx.UnsupportedProtocol as error:
+                raise requests.exceptions.InvalidURL(error, request = request)
+            except httpx.TransportError as error:
+                lastError = requests.exceptions.ConnectionError(error, request = request)
+                continue
+            except httpx.DecodingError as error:
+                raise requests.exceptions.ContentDecodingError(error, request = request)
+            except httpx.TooManyRedirects as error:
+                raise requests.exceptions.TooManyRedirects(error, request = request)
+            except httpx.RequestError as error:
+                raise requests.exceptions.RequestException(error, request = request)
+
+            # retry on "Too Many Requests" error and common server errors
+            if response.status_code in RETRY_STATUS:
+                lastError = requests.exceptions.RetryError(f"Too many {response.status_code} error responses", request = request)
+
+                # wait for time requested by server (same status codes as HTTP/1.1 adapter)
+                if response.status_code in self.retry.RETRY_AFTER_STATUS_CODES and "Retry-After" in response.headers:
+                    try:
+                        retryAfter = self.retry.parse_retry_after(response.headers["Retry-After"])
+                    except requests.packages.urllib3.exceptions.InvalidHeader as error:
+                        #print(error)    # for debug only
+                        pass    # use backoff
+                continue
+
+            return self.buildResponse(request, response)
+
+        raise lastError
+
+    def buildResponse(self, request, response):
+        '''Converts an httpx response to a requests response (content already decompressed)'''
+        result = requests.models.Response()
+        result.status_code = response.status_code
+        result.headers = requests.structures.CaseInsensitiveDict(response.headers)
+        result.encoding = requests.utils.get_encoding_from_headers(result.headers)
+        result.reason = response.reason_phrase
+        result.url = request.url
+        result.request = request
+        result._content = response.content
+        result._content_consumed = True
+        result.wireBytes = response.num_bytes_downloaded   # size of response body received (compressed)
+        return result
+
+    def close(self):
+        '''Closes all connections'''
+        for client in self.clients:
+            client.close()
+
+def benchmarkTransport(urls):
+    '''Compares HTTP/1.1 and HTTP/2 (if available) transports by requesting a list of urls using multiple threads
+    Outputs bytes received and requests per second for each transport
+    '''
+    importScrapingLibraries()
+    transports = {"HTTP/1.1": createHttp1Adapter()}
+    if httpx is not None:
+        transports["HTTP/2"] = Http2Adapter()
+    else:
+        print("\nHTTP/2 transport not available (install httpx with http2 support)")
+
+    def fetch(adapter, url):
+        # use a new session for each request (sessions are not thread safe) sharing the transport adapter
+        session = requests.Session()
+        session.headers = getSessionHeaders()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        response = session.get(url, timeout = 5, stream = True)
+
+        # count size of response body received before decompression
+        wireBytes = getattr(response, "wireBytes", None)
+        if wireBytes is None:
+            wireBytes = len(response.raw.read(decode_content = False))
+        return wireBytes
+
+    print(f"\nBenchmarking transports with {len(urls)} requests:")
+    for name, adapter in transports.items():
+        failed = 0
+        totalBytes = 0
+        startTime = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers = WORKERS) as executor:
+            for future in [executor.submit(fetch, adapter, url) for url in urls]:
+                try:
+                    totalBytes += future.result()
+                except requests.exceptions.RequestException as error:
+                    #print(error)    # for debug only
+                    failed += 1
+        seconds = time.perf_counter() - startTime
+        adapter.close()
+
+        print(f"    {name}: {len(urls) - failed} requests ({failed} failed) in {seconds:.2f} seconds, "
+              f"{(len(urls) - failed) / seconds:.1f} requests/sec, {totalBytes / 1024:.1f} KiB received")
+
+def checkConnection(host):
+    '''Tests connection to a database host and returns True or False depending on connection status
+    The connection is kept open in the shared connection pool for later requests
+    '''
+    global firstRequestTime
+    try:
+        session = startSession()
+        if firstRequestTime is None: firstRequestTime = time.perf_counter()
+        session.head(host, timeout = 5)
+    except requests.exceptions.RequestException as error:
+        #print(error)    # for debug only
+        postEvent(None, None, "warning", "Could not connect to '" + host + "'")
+        return False
+
+    postEvent(None, None, "info", "Successful connection to '" + host + "'")
+    return True
+
+####################################################################################################
+### Functions to schedule scrape ###
+
+def scheduleScrape(mediaList):
+    '''Scrapes each stage for all media using a single pool of threads and returns connection status and time of each stage
+    Jobs are run in order of user priority then longest estimated time first (from scrape history)
+    Later stages for a media are queued as soon as its information is scraped so no thread waits for a stage to finish
+    Connection to each database host is checked first and remaining jobs are cancelled if there is no connection
+    '''
+    stageFunctions = {"info": save_info, "episodes": save_info_episodes, "images": download_images}
+    laterStages = ["episodes", "images"] if scrapeTV else ["images"]
+
+    jobs = queue.PriorityQueue()    # stores jobs [priority, estimated time, order, stage, media] (lowest first)
+    order = itertools.count()       # keeps jobs with equal priority and estimated time in order added
+    stageTimes = {}                 # stores [start time, end time] (value) for each stage (key)
+    status = {"connected": True, "remaining": 0}
+    lock = threading.Lock()
+
+    def addJob(stage, media, cost, priority = None):
+        with lock:
+            status["remaining"] += 1
+        if priority is None:
+            priority = historyList.get(media, {}).get("Priority", 0)
+        jobs.put([-priority, -cost, next(order), stage, media])
+
+    def runJobs():
+        while True:
+            stage, media = jobs.get()[3:]
+            if stage is None:   # sentinel to stop thread
+                return
+
+            try:
+                # Check connection to database host
+                if stage == "connection":
+                    if checkConnection(media) is False:
+                        status["connected"] = False
+
+                # Scrape stage for media (skipped if there is no connection)
+                elif status["connected"]:
+                    jobStartTime = time.perf_counter()
+                    with lock:
+                        stageTimes.setdefault(stage, [jobStartTime, jobStartTime])
+                    try:
+                        retrieved = profileStage(stage, stageFunctions[stage])(media)
+                    finally:
+                        jobEndTime = time.perf_counter()
+                        with lock:
+                            stageTimes[stage][1] = max(stageTimes[stage][1], jobEndTime)
+
+                    # record time taken only for data retrieved online (not for data already present or failed scrapes)
+                    if retrieved:
+                        recordHistory(media, stage.capitalize() + " seconds", round(jobEndTime - jobStartTime, 3))
+
+                    # queue later stages for media
+                    if stage == "info":
+                        for laterStage in laterStages:
+                            addJob(laterStage, media, estimateCost(media, laterStage))
+            except Exception as error:
+                #print(error)    # for debug only
+                postEvent(stage, media, "failed", "Error when scraping '" + str(media) + "'")
+
+                # later stages for media are never queued so also finish them for progress
+                if stage == "info":
+                    for laterStage in laterStages:
+                        postEvent(laterStage, media, "start")
+                        postEvent(laterStage, media, "failed")
+
+            # stop all threads once there are no jobs remaining
+            with lock:
+                status["remaining"] -= 1
+                finished = status["remaining"] == 0
+            if finished:
+                for thread in threads:
+                    jobs.put([0, 0, next(order), None, None])
+
+    # queue connection checks before any other jobs (ahead of any user priority)
+    for host in DATABASE["Hosts"]:
+        addJob("connection", host, 0, priority = float("inf"))
+
+    # queue information for each media (estimated time includes later stages so the longest media start first)
+    for media in mediaList:
+        cost = estimateCost(media, "info") + max(estimateCost(media, laterStage) for laterStage in laterStages)
+        addJob("info", media, cost)
+
+    threads = [threading.Thread(target = runJobs, daemon = True) for i in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return status["connected"], stageTimes
+
+def estimateCost(media, stage):
+    '''Estimates seconds to scrape a stage for a media from scrape history'''
+    history = historyList.get(media, {})
+
+    # use time taken by previous scrape
+    if stage.capitalize() + " seconds" in history:
+        return history[stage.capitalize() + " seconds"]
+
+    # estimate episodes from number of seasons and average time taken for each season
+    if stage == "episodes" and "Seasons" in history:
+        return history["Seasons"] * averageHistory("Episodes seconds", "Seasons")
+
+    # use average time taken for stage by all media
+    return averageHistory(stage.capitalize() + " seconds")
+
+def averageHistory(field, perField = None):
+    '''Gets average value of a history field for all media (optionally per unit of another field)'''
+    total = 0
+    count = 0
+    for history in list(historyList.values()):
+        if field in history and (perField is None or history.get(perField, 0) > 0):
+            total += history[field]
+            count += history[perField] if perField is not None else 1
+
+    return total / count if count > 0 else DEFAULT_COST
+
+def recordHistory(media, field, value):
+    '''Records a value of a history field for a media'''
+    with historyLock:
+        historyList.setdefault(media, {})[field] = value
+
+def loadHistory():
+    '''Loads the scrape history of each media from the save folder'''
+    historyList.clear()
+    try:
+        with open(os.path.join(SAVE_FOLDER, HISTORY_NAME), newline = '') as file:
+            for row in csv.DictReader(file):
+                # convert each field with a value to a number
+                history = {}
+                for field in HISTORY_FIELDS[1:]:
+                    try:
+                        value = float(row[field])
+                        history[field] = int(value) if value.is_integer() else value
+                    except (KeyError, TypeError, ValueError):
+                        pass    # no value for field
+                historyList[row["Media"]] = history
+    except (OSError, KeyError) as error:
+        #print(error)    # for debug only
+        pass    # no history saved yet
+
+def saveHistory():
+    '''Saves the scrape history of each media to the save folder'''
+    historyName = os.path.join(SAVE_FOLDER, HISTORY_NAME)
+    try:
+        # write to a temporary file first so an interrupted save does not corrupt the history
+        with open(historyName + ".tmp", 'w', newline = '') as file:
+            csv_writer = csv.DictWriter(file, fieldnames = HISTORY_FIELDS)
+            csv_writer.writeheader()
+            with historyLock:
+                for media, history in historyList.items():
+                    csv_writer.writerow(dict(history, Media = media))
+        os.replace(historyName + ".tmp", historyName)
+    except OSError as error:
+        #print(error)    # for debug only
+        print("Could not save scrape history")
+
+####################################################################################################
+### Functions for event bus ###
+
+def postEvent(stage, media, status, message = ""):
+    '''Posts an event to the event bus to be output without waiting for the console
+    Outputs message immediately if event bus not running
+    '''
+    if eventThread is None:
+        if message: print(message)
+        return
+    eventQueue.put([time.time(), stage, media, status, message])
+
+def startEventBus(stageTotals):
+    '''Starts outputting events and live progress for the number of media (value) in each stage (key)'''
+    global eventThread
+    eventThread = threading.Thread(target = runEventBus, args = (stageTotals,), daemon = True)
+    eventThread.start()
+
+def stopEventBus():
+    '''Stops outputting events and live progress once all events have been output'''
+    global eventThread
+    eventQueue.put(None)    # sentinel to stop event bus
+    eventThread.join()
+    eventThread = None
+
+def runEventBus(stageTotals):
+    '''Outputs events from event bus and live progress until sentinel is received'''
+    inFlight = dict.fromkeys(stageTotals, 0)    # number of media being scraped for each stage
+    finished = dict.fromkeys(stageTotals, 0)    # number of media finished for each stage
+    startTime = time.perf_counter()
+    progressTime = startTime
+
+    # open event log
+    logFile = None
+    if SAVE_EVENT_LOG:
         try:
-            with startSession() as session:
-                # check IP address (Source: ipify.org)
-                ip = session.get('https://api.ipify.org', timeout = 5).text
-            print(f"\nSuccessful connection to internet (IP address: {ip})")
-            connectionStatus = True
-            
-        except requests.exceptions.RequestException as error:
+            logFile = open(os.path.join(SAVE_FOLDER, EVENT_LOG_NAME), 'a')
+        except OSError as error:
             #print(error)    # for debug only
-            print("\nNo connection.")
+            print("Could not open event log")
 
-            # ask user to retry connection test
-            connectQuestion = "Check internet connection and retry?"
-            connect = askUserBool(connectQuestion)
-            if connect is False:
-                connectionStatus = False
-                break
-            
-    return connectionStatus
+    while True:
+        try:
+            event = eventQueue.get(timeout = PROGRESS_INTERVAL)
+        except queue.Empty:
+            event = []   # no events, only update progress
+
+        # check for sentinel
+        if event is None:
+            break
+
+        if event:
+            eventTime, stage, media, status, message = event
+
+            # update number of media being scraped and finished for stage
+            if stage in inFlight:
+                if status == "start":
+                    inFlight[stage] += 1
+                elif status in FINISHED_EVENTS:
+                    inFlight[stage] -= 1
+                    finished[stage] += 1
+
+            # save event to event log
+            if logFile is not None:
+                logFile.write(json.dumps({"time": eventTime, "stage": stage, "media": media,
+                                          "status": status, "message": message}) + "\n")
+
+            # output event message if within verbosity
+            if message and VERBOSITY >= EVENT_VERBOSITY[status]:
+                clearProgress()
+                print(message)
+
+        # output progress at set interval
+        if time.perf_counter() - progressTime >= PROGRESS_INTERVAL:
+            showProgress(stageTotals, inFlight, finished, startTime)
+            progressTime = time.perf_counter()
+
+    # output final progress
+    showProgress(stageTotals, inFlight, finished, startTime)
+    print()
+    if logFile is not None:
+        logFile.close()
+
+def showProgress(stageTotals, inFlight, finished, startTime):
+    '''Outputs a single line of progress (media per second, media being scraped for each stage and time remaining)'''
+    total = sum(stageTotals.values())
+    done = sum(finished.values())
+    elapsed = time.perf_counter() - startTime
+    rate = done / elapsed if elapsed > 0 else 0
+    remaining = time.strftime("%H:%M:%S", time.gmtime((total - done) / rate)) if rate > 0 else "--:--:--"
+
+    stages = " | ".join(f"{stage}: {finished[stage]}/{stageTotals[stage]} ({inFlight[stage]} running)"
+                        for stage in stageTotals if stageTotals[stage] > 0)
+    progress = f"{stages} | {rate:.1f}/s | ETA {remaining}"
+
+    # fit progress to a single line of the console
+    width = shutil.get_terminal_size().columns - 1
+    sys.stdout.write("\r" + progress[:width].ljust(width))
+    sys.stdout.flush()
+
+def clearProgress():
+    '''Clears the current line of progress from the console'''
+    width = shutil.get_terminal_size().columns - 1
+    sys.stdout.write("\r" + " " * width + "\r")
+
+####################################################################################################
+### Functions for profiler ###
+
+def startProfiler():
+    '''Starts sampling the stack of each thread running a stage and tracing memory allocations'''
+    global profileThread
+    global profileRunning
+
+    profileStages.clear()
+    profileSamples.clear()
+    profileTimes.clear()
+    profileMemory.clear()
+    profileSites.clear()
+
+    # load scraping libraries and create connection pools before tracing so reports only measure the scrape
+    importScrapingLibraries()
+    startSession()
+
+    # trace only the frame allocating memory (deeper tracebacks slow down the scrape too much)
+    tracemalloc.start()
+
+    profileRunning = threading.Event()
+    profileRunning.set()
+    profileThread = threading.Thread(target = runProfiler, daemon = True)
+    profileThread.start()
+
+def runProfiler():
+    '''Samples the stack of each thread running a stage at a set interval until profiler is stopped
+    Memory allocated between samples is shared between the stages running at the time of each sample
+    '''
+    snapshot = snapshotMemory()
+    snapshotTime = time.perf_counter()
+    snapshotStages = collections.Counter()  # stores number of samples (value) of each stage (key) since last snapshot
+    tracemalloc.reset_peak()
+    previousMemory = tracemalloc.get_traced_memory()[0]
+
+    while True:
+        running = profileRunning.is_set()
+        frames = sys._current_frames()
+        stages = []
+        for threadID, stage in list(profileStages.items()):
+            stages.append(stage)
+            frame = frames.get(threadID)
+
+            # get stack from root function to current function
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack = tuple(reversed(stack))
+
+            stageSamples = profileSamples.setdefault(stage, collections.Counter())
+            stageSamples[stack] += 1
+
+        # Share memory allocated since last sample (highest peak above previous memory) between stages running
+        memory, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for stage in stages:
+            stageMemory = profileMemory.setdefault(stage, [0, 0])
+            stageMemory[0] += max(0, peak - previousMemory) / len(stages)
+            stageMemory[1] = max(stageMemory[1], peak)
+        snapshotStages.update(stages)
+        previousMemory = memory
+
+        # Share memory allocated at each site since last snapshot between stages sampled since last snapshot
+        if not running or time.perf_counter() - snapshotTime >= PROFILE_SNAPSHOT_INTERVAL:
+            newSnapshot = snapshotMemory()
+            samples = sum(snapshotStages.values())
+            for statistic in newSnapshot.compare_to(snapshot, 'lineno'):
+                if samples == 0 or statistic.size_diff <= 0:
+                    break   # statistics are sorted by largest size difference first
+                frame = statistic.traceback[0]
+                for stage, count in snapshotStages.items():
+                    profileSites.setdefault(stage, collections.Counter())[f"{frame.filename}:{frame.lineno}"] += statistic.size_diff * count / samples
+            snapshot = newSnapshot
+            snapshotTime = time.perf_counter()
+            snapshotStages.clear()
+
+            # do not count memory allocated for snapshot
+            tracemalloc.reset_peak()
+            previousMemory = tracemalloc.get_traced_memory()[0]
+
+        if not running:
+            break
+        time.sleep(PROFILE_INTERVAL)
+
+def snapshotMemory():
+    '''Takes a snapshot of memory allocations excluding those made by tracemalloc'''
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+def profileStage(stage, function):
+    '''Returns function which records the stage being run by its thread and the time taken for each media
+    Returns function unchanged if not profiling
+    '''
+    if not PROFILE_SCRAPE:
+        return function
+
+    def profiledFunction(media):
+        threadID = threading.get_ident()
+        profileStages[threadID] = stage
+        wallStart = time.perf_counter()
+        cpuStart = time.thread_time()
+        try:
+            return function(media)
+        finally:
+            cpuTime = time.thread_time() - cpuStart
+            wallTime = time.perf_counter() - wallStart
+            del profileStages[threadID]
+            with profileLock:
+                stageTimes = profileTimes.setdefault(stage, [0, 0, 0])
+                stageTimes[0] += 1
+                stageTimes[1] += wallTime
+                stageTimes[2] += cpuTime
+
+    return profiledFunction
+
+def stopProfiler():
+    '''Stops profiler and saves reports for each stage to profile folder
+    Saves a summary of the top functions, memory allocated and allocation sites and a collapsed stack file for each stage
+    '''
+    profileRunning.clear()
+    profileThread.join()
+    tracemalloc.stop()
+
+    # Check if profile folder already exists before creating
+    profileFolder = os.path.join(SAVE_FOLDER, PROFILE_FOLDER_NAME)
+    if not os.path.exists(profileFolder):
+        os.mkdir(profileFolder)
+
+    report = []
+
+    # Summarise CPU time and samples for each stage
+    for stage, stageSamples in profileSamples.items():
+        media, wallTime, cpuTime = profileTimes.get(stage, [0, 0, 0])
+        report.append(f"{'-'*20} Stage: {stage} {'-'*20}")
+        report.append(f"Media: {media}    Wall time: {wallTime:.2f} s    CPU time: {cpuTime:.2f} s    Samples: {sum(stageSamples.values())}")
+
+        # count samples where function is running (self) or anywhere in the stack (total)
+        selfSamples = collections.Counter()
+        totalSamples = collections.Counter()
+        for stack, count in stageSamples.items():
+            selfSamples[stack[-1]] += count
+            for function in set(stack):
+                totalSamples[function] += count
+
+        report.append(f"\nTop {PROFILE_TOP} functions (self samples):")
+        report.extend(f"    {count:>8}  {function}" for function, count in selfSamples.most_common(PROFILE_TOP))
+        report.append(f"\nTop {PROFILE_TOP} functions (total samples):")
+        report.extend(f"    {count:>8}  {function}" for function, count in totalSamples.most_common(PROFILE_TOP))
+
+        # Summarise memory allocated while stage was running (shared with other stages running at the same time)
+        allocated, peak = profileMemory.get(stage, [0, 0])
+        report.append(f"\nMemory allocated: {allocated / 1024:.1f} KiB    Peak traced memory: {peak / 1024:.1f} KiB")
+        report.append(f"\nTop {PROFILE_TOP} allocation sites (memory still allocated at next snapshot):")
+        for site, size in profileSites.get(stage, collections.Counter()).most_common(PROFILE_TOP):
+            report.append(f"    {size / 1024:>10.1f} KiB  {site}")
+        report.append("\n")
+
+        # Save collapsed stacks for flamegraph
+        try:
+            with open(os.path.join(profileFolder, stage + " stacks.txt"), 'w') as file:
+                for stack, count in stageSamples.items():
+                    file.write(";".join(stack) + " " + str(count) + "\n")
+        except OSError as error:
+            #print(error)    # for debug only
+            print("Could not save collapsed stacks for '" + stage + "'")
+
+    # Save report
+    try:
+        with open(os.path.join(profileFolder, "profile.txt"), 'w') as file:
+            file.write("\n".join(report))
+    except OSError as error:
+        #print(error)    # for debug only
+        print("Could not save profile report")
+        return
+
+    print("\nSaved profile reports to '" + profileFolder + "'")
 
 ####################################################################################################
 ### Functions to check user input ###
@@ -573,34 +1626,668 @@ def getEpisodePlot(episodeData):
     
     return episodePlot
 
+####################################################################################################
+### Functions for poster store ###
+
+def loadPosterStore():
+    '''Creates the poster store in the save folder and loads the cache of previously downloaded poster urls'''
+    global POSTER_STORE
+    POSTER_STORE = os.path.join(SAVE_FOLDER, POSTER_STORE_NAME)
+
+    # Check if poster store already exists before creating
+    if not os.path.exists(POSTER_STORE):
+        os.mkdir(POSTER_STORE)
+
+    # Load poster urls with an image still present in the poster store
+    posterHashes.clear()
+    indexName = os.path.join(POSTER_STORE, POSTER_INDEX_NAME)
+    try:
+        with open(indexName, newline = '') as file:
+            for row in csv.reader(file):
+                if len(row) == 2 and os.path.exists(getPosterBlob(row[1])):
+                    posterHashes[row[0]] = row[1]
+    except OSError as error:
+        #print(error)    # for debug only
+        pass    # no index saved yet
+
+    # Load existing poster images already hashed which could not be linked to the poster store
+    posterAdopted.clear()
+    try:
+        with open(os.path.join(POSTER_STORE, POSTER_ADOPTED_NAME), newline = '') as file:
+            for row in csv.reader(file):
+                if len(row) == 4 and row[1].isdigit() and row[2].isdigit():
+                    posterAdopted[row[0]] = [int(row[1]), int(row[2]), row[3]]
+    except OSError as error:
+        #print(error)    # for debug only
+        pass    # no images hashed yet
+
+    # Add any existing poster images not yet in the poster store
+    posterImages = [fileName for fileName in os.listdir(SAVE_FOLDER) if fileName.endswith(" poster.jpg")]
+    for fileName in posterImages:
+        adoptPoster(os.path.join(SAVE_FOLDER, fileName))
+
+    # remove images no longer in save folder
+    for fileName in set(posterAdopted) - set(posterImages):
+        del posterAdopted[fileName]
+
+def savePosterStore():
+    '''Saves the cache of downloaded poster urls to the poster store index'''
+    indexName = os.path.join(POSTER_STORE, POSTER_INDEX_NAME)
+    try:
+        # write to a temporary file first so an interrupted save does not corrupt the index
+        with open(indexName + ".tmp", 'w', newline = '') as file:
+            csv_writer = csv.writer(file, delimiter = ',')
+            csv_writer.writerows(posterHashes.items())
+        os.replace(indexName + ".tmp", indexName)
+
+        # save existing images which could not be linked so they are not hashed again
+        adoptedName = os.path.join(POSTER_STORE, POSTER_ADOPTED_NAME)
+        with open(adoptedName + ".tmp", 'w', newline = '') as file:
+            csv_writer = csv.writer(file, delimiter = ',')
+            csv_writer.writerows([fileName] + adopted for fileName, adopted in posterAdopted.items())
+        os.replace(adoptedName + ".tmp", adoptedName)
+    except OSError as error:
+        #print(error)    # for debug only
+        print("Could not save poster store index")
+
+def getPosterBlob(contentHash):
+    '''Gets file path of a poster image in the poster store from its content hash'''
+    return os.path.join(POSTER_STORE, contentHash + ".jpg")
+
+def getPosterLock(posterURL):
+    '''Gets lock for a poster url so the same poster is only downloaded once by multiple threads'''
+    with posterStoreLock:
+        return posterLocks.setdefault(posterURL, threading.Lock())
+
+def storePoster(content):
+    '''Saves poster image content to the poster store (if not already present) and returns its content hash'''
+    contentHash = hashlib.sha256(content).hexdigest()
+    blobName = getPosterBlob(contentHash)
+
+    # Check if identical image already stored
+    if not os.path.exists(blobName):
+        # write to a temporary file (unique to this thread) first so only complete images are stored
+        tempName = blobName + "." + str(threading.get_ident()) + ".tmp"
+        with open(tempName, 'wb') as file:
+            file.write(content)
+        os.replace(tempName, blobName)
+
+    return contentHash
+
+def linkPoster(contentHash, imageName):
+    '''Links a media poster file to an image in the poster store
+    Uses a hardlink where supported, otherwise a symlink, otherwise a copy of the image
+    '''
+    blobName = getPosterBlob(contentHash)
+    try:
+        os.link(blobName, imageName)
+    except OSError:
+        try:
+            # relative link so the save folder can be moved
+            os.symlink(os.path.relpath(blobName, SAVE_FOLDER), imageName)
+        except OSError:
+            shutil.copyfile(blobName, imageName)
+
+def adoptPoster(imageName):
+    '''Adds an existing poster image to the poster store, replacing it with a hardlink if the image is a duplicate
+    Images which cannot be linked (hardlinks not supported) are recorded so they are not read and hashed again
+    '''
+    fileName = os.path.basename(imageName)
+    try:
+        # skip images already linked to the poster store
+        if os.path.islink(imageName):
+            return
+        imageStat = os.stat(imageName)
+        if imageStat.st_nlink > 1:
+            return
+
+        # skip unchanged images already hashed which could not be linked
+        if posterAdopted.get(fileName, [])[:2] == [imageStat.st_size, imageStat.st_mtime_ns]:
+            return
+
+        with open(imageName, 'rb') as file:
+            contentHash = hashlib.sha256(file.read()).hexdigest()
+    except OSError as error:
+        #print(error)    # for debug only
+        return  # could not read image, leave existing image as it is
+
+    blobName = getPosterBlob(contentHash)
+    try:
+        if not os.path.exists(blobName):
+            # move existing image into the poster store without copying
+            os.link(imageName, blobName)
+        else:
+            # replace duplicate image with a hardlink to the stored image
+            tempName = imageName + ".tmp"
+            os.link(blobName, tempName)
+            os.replace(tempName, imageName)
+    except OSError as error:
+        #print(error)    # for debug only
+        # hardlinks not supported, leave existing image as it is
+        posterAdopted[fileName] = [imageStat.st_size, imageStat.st_mtime_ns, contentHash]
+
+####################################################################################################
+### Functions for library file ###
+
+def loadLibrary():
+    '''Opens the library file in the save folder and loads the cache of media already in the library'''
+    global libraryConnection
+
+    # connection is shared between threads (all writes are made while holding libraryLock)
+    libraryConnection = sqlite3.connect(os.path.join(SAVE_FOLDER, LIBRARY_NAME), check_same_thread = False)
+    libraryConnection.executescript(LIBRARY_SCHEMA)
+
+    # Load media already in library
+    libraryInfo.clear()
+    for media, mediaID, mediaPoster in libraryConnection.execute("SELECT media, database_id, poster_link FROM info"):
+        libraryInfo[media] = [mediaID, mediaPoster]
+    libraryEpisodes.clear()
+    libraryEpisodes.update(row[0] for row in libraryConnection.execute("SELECT media FROM episode_lists"))
+    libraryPosters.clear()
+    libraryPosters.update(row[0] for row in libraryConnection.execute("SELECT media FROM media_posters"))
+    libraryHashes.clear()
+    libraryHashes.update(row[0] for row in libraryConnection.execute("SELECT hash FROM posters"))
+
+    # Load poster urls already downloaded to library
+    posterHashes.clear()
+    posterHashes.update(libraryConnection.execute("SELECT url, hash FROM poster_urls"))
+
+def addLibraryRows(rows):
+    '''Adds rows for each library table (key) to be written to the library file
+    All rows added together are written in the same transaction
+    '''
+    with libraryLock:
+        for table, tableRows in rows.items():
+            libraryRows.setdefault(table, []).extend(tableRows)
+        pendingRows = sum(len(tableRows) for tableRows in libraryRows.values())
+
+    # write rows once a full batch is waiting
+    if pendingRows >= LIBRARY_BATCH_SIZE:
+        flushLibrary()
+
+def flushLibrary():
+    '''Writes all rows waiting to be written to the library file in a single transaction'''
+    with libraryLock:
+        try:
+            with libraryConnection:     # commits transaction (or rolls back if there is an error)
+                for table, tableRows in libraryRows.items():
+                    if len(tableRows) > 0:
+                        placeholders = ", ".join("?" * len(tableRows[0]))
+                        libraryConnection.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})", tableRows)
+        except sqlite3.Error as error:
+            #print(error)    # for debug only
+            postEvent(None, None, "warning", "Could not save scraped data to library file")
+            return
+        libraryRows.clear()
+
+def storeLibraryPoster(content):
+    '''Adds poster image content to the library file (if not already present) and returns its content hash'''
+    contentHash = hashlib.sha256(content).hexdigest()
+
+    # Check if identical image already stored
+    with libraryLock:
+        newImage = contentHash not in libraryHashes
+        libraryHashes.add(contentHash)
+    if newImage:
+        addLibraryRows({"posters": [(contentHash, content)]})
+
+    return contentHash
+
+def exportLibrary(folder):
+    '''Exports the library file to separate text, csv and jpg files for each media in a folder'''
+    print("\nExporting library file to '" + folder + "'...")
+    flushLibrary()
+
+    try:
+        # Save information to text file for each media
+        for row in libraryConnection.execute("SELECT * FROM info"):
+            info = [field + ": " + value for field, value in zip(INFO_FIELDS, row[1:])]
+            with open(os.path.join(folder, row[0] + ".txt"), 'w') as file:
+                file.write("\n".join(info))
+
+        # Save episode information to csv file for each media
+        for (media,) in libraryConnection.execute("SELECT media FROM episode_lists"):
+            with open(os.path.join(folder, media + " episodes.csv"), 'w', newline = '') as file:
+                csv_writer = csv.writer(file, delimiter = ',')
+                csv_writer.writerow(EPISODE_FIELDS)
+                csv_writer.writerows(libraryConnection.execute(
+                    "SELECT season, episode, title, date, description FROM episodes WHERE media = ? ORDER BY rowid", (media,)))
+
+        # Save image to jpg file for each media
+        for media, image in libraryConnection.execute(
+                "SELECT media_posters.media, posters.image FROM media_posters JOIN posters ON media_posters.hash = posters.hash"):
+            with open(os.path.join(folder, media + " poster.jpg"), 'wb') as file:
+                file.write(image)
+    except OSError as error:
+        #print(error)    # for debug only
+        print("Could not export library file to '" + folder + "'")
+        return
+
+    print("\nExported library file to '" + folder + "'")
+
+####################################################################################################
+### Functions for episode index ###
+
+def loadEpisodeIndex(saveFolder):
+    '''Creates the episode index in a save folder and loads the lookup of shows in the index'''
+    global EPISODE_INDEX
+    EPISODE_INDEX = os.path.join(saveFolder, EPISODE_INDEX_NAME)
+
+    # Check if episode index already exists before creating
+    if not os.path.exists(EPISODE_INDEX):
+        os.mkdir(EPISODE_INDEX)
+
+    # Load first row and number of rows for each show
+    episodeIndexShows.clear()
+    try:
+        with open(os.path.join(EPISODE_INDEX, EPISODE_INDEX_SHOWS), newline = '') as file:
+            for showID, firstRow, rowCount in csv.reader(file):
+                episodeIndexShows[int(showID)] = [int(firstRow), int(rowCount)]
+    except (OSError, ValueError) as error:
+        #print(error)    # for debug only
+        pass    # no lookup saved yet
+
+def getEpisodeIndexRows():
+    '''Gets number of complete rows in the episode index'''
+    rowCounts = []
+    for column, typecode in EPISODE_INDEX_COLUMNS.items():
+        columnName = os.path.join(EPISODE_INDEX, column)
+        columnSize = os.path.getsize(columnName) if os.path.exists(columnName) else 0
+        rowCounts.append(columnSize // array.array(typecode).itemsize)
+
+    return min(rowCounts)
+
+def parseEpisodeDate(episodeDate):
+    '''Converts an episode air date from the database to an ordinal (0 if unknown)'''
+    dateMatch = EPISODE_DATE_PATTERN.match(episodeDate.strip())
+    if dateMatch is None:
+        return 0
+
+    # missing day or month is set to the first day or month
+    day, month, year = dateMatch.groups()
+    try:
+        return datetime.date(int(year), MONTHS.get((month or "jan").lower(), 1), int(day or 1)).toordinal()
+    except ValueError:
+        return 0
+
+def parseEpisodeInteger(value):
+    '''Converts a season or episode number from the database to an integer (-1 if unknown or too large for index)'''
+    try:
+        number = int(value)
+    except ValueError:
+        return -1
+
+    return number if 0 <= number <= EPISODE_INDEX_MAX_NUMBER else -1
+
+def addEpisodeIndex(mediaID, episodeRows):
+    '''Appends typed episode rows [season, episode, title, date, description] for a show to the episode index'''
+    showID = int(mediaID[2:])   # remove 'tt' prefix of database ID
+
+    # convert episode information to typed columns
+    columns = {column: array.array(typecode) for column, typecode in EPISODE_INDEX_COLUMNS.items()}
+    titles = bytearray()
+    for season, episode, title, date, description in episodeRows:
+        columns["show"].append(showID)
+        columns["season"].append(parseEpisodeInteger(season))
+        columns["episode"].append(parseEpisodeInteger(episode))
+        columns["date"].append(parseEpisodeDate(date))
+        titles.extend(title.encode())
+        columns["title"].append(len(titles))
+
+    # Append columns to episode index
+    with episodeIndexLock:
+        firstRow = getEpisodeIndexRows()
+
+        # titles start after the end offset of the title in the last complete row
+        titlesStart = array.array('q')
+        if firstRow > 0:
+            with open(os.path.join(EPISODE_INDEX, "title"), 'rb') as file:
+                file.seek((firstRow - 1) * titlesStart.itemsize)
+                titlesStart.fromfile(file, 1)
+        titlesStart = titlesStart[0] if firstRow > 0 else 0
+        columns["title"] = array.array('q', (offset + titlesStart for offset in columns["title"]))
+
+        with open(os.path.join(EPISODE_INDEX, EPISODE_INDEX_TITLES), 'ab') as file:
+            file.truncate(titlesStart)
+            file.write(titles)
+        for column, values in columns.items():
+            columnName = os.path.join(EPISODE_INDEX, column)
+            with open(columnName, 'ab') as file:
+                # truncate any partially written rows from an interrupted append
+                file.truncate(firstRow * values.itemsize)
+                values.tofile(file)
+
+        # any previous rows for the show are replaced by the new rows
+        episodeIndexShows[showID] = [firstRow, len(episodeRows)]
+
+def saveEpisodeIndex():
+    '''Saves the lookup of shows and rebuilds the lookup of rows sorted by air date in the episode index'''
+    with episodeIndexLock:
+        try:
+            # Save first row and number of rows for each show
+            with open(os.path.join(EPISODE_INDEX, EPISODE_INDEX_SHOWS + ".tmp"), 'w', newline = '') as file:
+                csv_writer = csv.writer(file, delimiter = ',')
+                for showID, (firstRow, rowCount) in episodeIndexShows.items():
+                    csv_writer.writerow([showID, firstRow, rowCount])
+            os.replace(os.path.join(EPISODE_INDEX, EPISODE_INDEX_SHOWS + ".tmp"), os.path.join(EPISODE_INDEX, EPISODE_INDEX_SHOWS))
+
+            # Sort current rows for each show by air date
+            with openEpisodeIndex() as index:
+                dates = index["date"]
+                rows = [row for firstRow, rowCount in episodeIndexShows.values() for row in range(firstRow, firstRow + rowCount)]
+                rows.sort(key = dates.__getitem__)
+                dateRows = array.array('i', rows)
+                dateKeys = array.array('i', (dates[row] for row in rows))
+
+            # Save sorted rows and their air dates
+            for column, values in [(EPISODE_INDEX_DATE_ROWS, dateRows), (EPISODE_INDEX_DATE_KEYS, dateKeys)]:
+                columnName = os.path.join(EPISODE_INDEX, column)
+                with open(columnName + ".tmp", 'wb') as file:
+                    values.tofile(file)
+                os.replace(columnName + ".tmp", columnName)
+        except OSError as error:
+            #print(error)    # for debug only
+            postEvent(None, None, "warning", "Could not save episode index")
+
+@contextlib.contextmanager
+def openEpisodeIndex():
+    '''Memory maps each column of the episode index and returns them as a dictionary of read only arrays'''
+    columns = list(EPISODE_INDEX_COLUMNS.items())
+    columns += [(EPISODE_INDEX_TITLES, 'B'), (EPISODE_INDEX_DATE_ROWS, 'i'), (EPISODE_INDEX_DATE_KEYS, 'i')]
+
+    index = {}
+    views = []      # list to hold all views of mapped files (released before closing maps)
+    maps = []
+    try:
+        for column, typecode in columns:
+            columnName = os.path.join(EPISODE_INDEX, column)
+
+            # check for no data (empty files cannot be memory mapped)
+            if not os.path.exists(columnName) or os.path.getsize(columnName) == 0:
+                index[column] = memoryview(b'').cast(typecode)
+                continue
+
+            with open(columnName, 'rb') as file:
+                maps.append(mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ))
+
+            # ignore any partially written value at end of file
+            itemsize = array.array(typecode).itemsize
+            views.append(memoryview(maps[-1]))
+            views.append(views[-1][:len(views[-1]) - len(views[-1]) % itemsize])
+            views.append(views[-1].cast(typecode))
+            index[column] = views[-1]
+
+        yield index
+
+    finally:
+        index.clear()
+        for view in reversed(views):
+            view.release()
+        for fileMap in maps:
+            fileMap.close()
+
+def getEpisodeIndexRow(index, row):
+    '''Gets typed episode information [database ID, season, episode, air date, title] for a row in the episode index'''
+    titleStart = index["title"][row - 1] if row > 0 else 0
+    title = bytes(index[EPISODE_INDEX_TITLES][titleStart:index["title"][row]]).decode()
+    date = datetime.date.fromordinal(index["date"][row]) if index["date"][row] > 0 else None
+    season = index["season"][row] if index["season"][row] >= 0 else None
+    episode = index["episode"][row] if index["episode"][row] >= 0 else None
+
+    return ["tt" + str(index["show"][row]).zfill(7), season, episode, date, title]
+
+def queryEpisodesByShow(mediaID):
+    '''Gets all episodes in the episode index for a database ID'''
+    showID = int(mediaID[2:])
+    if showID not in episodeIndexShows:
+        return []
+
+    firstRow, rowCount = episodeIndexShows[showID]
+    with openEpisodeIndex() as index:
+        return [getEpisodeIndexRow(index, row) for row in range(firstRow, firstRow + rowCount)]
+
+def queryEpisodesByDate(startDate, endDate):
+    '''Gets all episodes in the episode index which aired between two dates (inclusive)'''
+    with openEpisodeIndex() as index:
+        dateKeys = index[EPISODE_INDEX_DATE_KEYS]
+        start = bisect.bisect_left(dateKeys, startDate.toordinal())
+        end = bisect.bisect_right(dateKeys, endDate.toordinal())
+        return [getEpisodeIndexRow(index, index[EPISODE_INDEX_DATE_ROWS][i]) for i in range(start, end)]
+
+def showEpisodesAired(saveFolder, days = EPISODE_QUERY_DAYS):
+    '''Outputs episodes in the episode index of a save folder which aired in the last number of days (e.g. last week)
+    Loads the episode index itself so can be used without scraping
+    '''
+    # Check for episode index in save folder
+    if not os.path.exists(os.path.join(saveFolder, EPISODE_INDEX_NAME)):
+        print("\nNo episode index found in '" + saveFolder + "'")
+        return
+    loadEpisodeIndex(saveFolder)
+
+    # Get media name for each database ID from title index (database ID shown if not in title index)
+    mediaNames = {}
+    try:
+        with open(os.path.join(saveFolder, TITLE_INDEX_NAME), newline = '') as file:
+            for row in csv.DictReader(file):
+                mediaNames[row["Database ID"]] = row["Media"]
+    except (OSError, KeyError) as error:
+        #print(error)    # for debug only
+        pass    # no title index saved yet
+
+    endDate = datetime.date.today()
+    startDate = endDate - datetime.timedelta(days = days)
+    try:
+        episodes = queryEpisodesByDate(startDate, endDate)
+    except (OSError, ValueError) as error:
+        #print(error)    # for debug only
+        print("\nCould not read episode index in '" + saveFolder + "'")
+        return
+
+    print(f"\n{len(episodes)} episodes aired from {startDate} to {endDate}:")
+    for mediaID, season, episode, date, title in episodes:
+        number = f"S{season if season is not None else '?'} E{episode if episode is not None else '?'}"
+        print(f"    {date}  {mediaNames.get(mediaID, mediaID)}  {number}  {title}")
+
+####################################################################################################
+### Functions to verify scraped data ###
+
+def verifySaveFolder():
+    '''Verifies all scraped files in the save folder using multiple processes
+    Deletes any broken files and returns a list of media with broken files to be rescraped
+    '''
+    print("\nVerifying scraped data in '" + SAVE_FOLDER + "'...")
+    verifyStartTime = time.perf_counter()
+
+    # list all scraped files (including images in poster store)
+    fileNames = [os.path.join(SAVE_FOLDER, fileName) for fileName in os.listdir(SAVE_FOLDER)
+                 if fileName.endswith((".txt", " episodes.csv", " poster.jpg"))]
+    posterStore = os.path.join(SAVE_FOLDER, POSTER_STORE_NAME)
+    if os.path.exists(posterStore):
+        fileNames.extend(os.path.join(posterStore, fileName) for fileName in os.listdir(posterStore) if fileName.endswith(".jpg"))
+
+    # split files into chunks for each process (several chunks per process to balance load)
+    processes = os.cpu_count() or 1
+    chunkSize = max(1, len(fileNames) // (processes * 4) + 1)
+    chunks = [fileNames[i:i + chunkSize] for i in range(0, len(fileNames), chunkSize)]
+
+    # Verify files using multiple processes
+    brokenFiles = []
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        for chunkBrokenFiles in executor.map(verifyFiles, chunks):
+            brokenFiles.extend(chunkBrokenFiles)
+
+    # Leave broken text files which are not recognisably scraped information (other files in save folder)
+    scrapedMedia = {os.path.basename(fileName)[:-len(suffix)] for fileName in fileNames
+                    for suffix in [" episodes.csv", " poster.jpg"] if fileName.endswith(suffix)}
+    unrecognisedFiles = [fileName for fileName in brokenFiles if fileName.endswith(".txt")
+                         and os.path.basename(fileName)[:-len(".txt")] not in scrapedMedia and not isScrapedText(fileName)]
+    brokenFiles = [fileName for fileName in brokenFiles if fileName not in unrecognisedFiles]
+
+    # Delete broken files and get media names for rescrape
+    brokenMedia = []
+    for fileName in brokenFiles:
+        try:
+            os.remove(fileName)
+        except OSError as error:
+            #print(error)    # for debug only
+            print("Could not delete broken file '" + fileName + "'")
+            continue
+
+        media = os.path.basename(fileName)
+        for suffix in [" poster.jpg", " episodes.csv", ".txt"]:
+            if media.endswith(suffix):
+                media = media[:-len(suffix)]
+                break
+
+        # images in poster store are linked to media posters which are verified separately
+        if os.path.dirname(fileName) != posterStore and media not in brokenMedia:
+            brokenMedia.append(media)
+
+    verifyEndTime = time.perf_counter()
+    print(f"\nVerified {len(fileNames)} files in {(verifyEndTime - verifyStartTime):.2f} seconds")
+    if len(brokenFiles) > 0:
+        print(f"Deleted {len(brokenFiles)} broken files, rescraping:\n{brokenMedia}\n")
+    else:
+        print("No broken files found\n")
+    if len(unrecognisedFiles) > 0:
+        print(f"Left {len(unrecognisedFiles)} unrecognised text files unchanged (not scraped information):\n"
+              f"{[os.path.basename(fileName) for fileName in unrecognisedFiles]}\n")
+
+    return brokenMedia
+
+def isScrapedText(fileName):
+    '''Checks if a text file starts with the first information field (saved by the scraper)'''
+    try:
+        with open(fileName) as file:
+            return file.readline().startswith(INFO_FIELDS[0] + ": ")
+    except (OSError, ValueError) as error:
+        #print(error)    # for debug only
+        return False
+
+def verifyFiles(fileNames):
+    '''Verifies a list of scraped files and returns a list of broken files (run by each process)'''
+    brokenFiles = []
+    for fileName in fileNames:
+        try:
+            if os.path.getsize(fileName) == 0:
+                valid = False
+            else:
+                # memory map file to avoid copying it into memory
+                with open(fileName, 'rb') as file, mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as data:
+                    if fileName.endswith(".jpg"):
+                        valid = verifyImage(data)
+                    elif fileName.endswith(" episodes.csv"):
+                        valid = verifyTable(data)
+                    else:
+                        valid = verifyText(data)
+        except (OSError, ValueError) as error:
+            #print(error)    # for debug only
+            valid = False
+
+        if not valid:
+            brokenFiles.append(fileName)
+
+    return brokenFiles
+
+def verifyImage(data):
+    '''Checks a poster image is a complete jpg or png image'''
+    if len(data) < VERIFY_MIN_IMAGE_SIZE:
+        return False
+
+    # check signature at start and end marker within the last bytes (allowing for padding)
+    if data[:len(JPEG_START)] == JPEG_START:
+        return data.rfind(JPEG_END, len(data) - 32) != -1
+    if data[:len(PNG_START)] == PNG_START:
+        return data.rfind(PNG_END, len(data) - 32) != -1
+
+    return False
+
+def verifyTable(data):
+    '''Checks an episode csv file has the episode fields header and a complete row for each episode'''
+    # decode using the default encoding for text files (used when saving the file)
+    rows = csv.reader(io.StringIO(data[:].decode(locale.getpreferredencoding(False)), newline = ''))
+    if next(rows, None) != EPISODE_FIELDS:
+        return False
+
+    for row in rows:
+        # each row must have every field and a season number
+        if len(row) != len(EPISODE_FIELDS) or not row[0].lstrip("-").isdigit():
+            return False
+
+    return True
+
+def verifyText(data):
+    '''Checks a text file has every information field with a valid database ID and poster url'''
+    # decode using the default encoding for text files (used when saving the file)
+    lines = data[:].decode(locale.getpreferredencoding(False)).replace("\r\n", "\n").split("\n")
+    if len(lines) != len(INFO_FIELDS):
+        return False
+
+    # each line must start with its field
+    for field, line in zip(INFO_FIELDS, lines):
+        if not line.startswith(field + ": "):
+            return False
+
+    mediaID = lines[1].replace("Database ID: ", "").strip()
+    posterURL = lines[-1].replace("Poster link: ", "").strip()
+    return isValidID(mediaID) and isValidPosterURL(posterURL)
+
+def isValidID(mediaID):
+    '''Checks a database ID read from a text file is valid ("Unknown" if no ID)'''
+    return mediaID == "Unknown" or ID_PATTERN.match(mediaID) is not None
+
+def isValidPosterURL(posterURL):
+    '''Checks a poster url read from a text file is valid ("Unknown" if no poster)'''
+    return posterURL == "Unknown" or POSTER_URL_PATTERN.match(posterURL) is not None
+
 ####################################################################################################
 ### Functions to save scraped data ###
 
 def save_info(media):
     '''Scrapes media information and saves it to a text file
     Sets values to posterList cache and idList cache
+    Returns True if the media was searched online (time taken is added to scrape history)
     '''
     infoScraped[media] = False  # initialise information scrape status
+    postEvent("info", media, "start")
 
     textName = os.path.join(SAVE_FOLDER, media + ".txt")    # text file path
 
+    # Check if media information already in library file
+    if useLibrary and media in libraryInfo:
+        postEvent("info", media, "present", "'" + media + "' information already present in library file")
+        infoScraped[media] = True   # set information scrape status to indicate successful scrape
+        idList[media] = libraryInfo[media][0]       # add database id for media to id cache
+        posterList[media] = libraryInfo[media][1]   # add poster url for media to poster cache
+        recordTitle(media, idList[media])
+        return
+
     # Check if text file already exists
-    if os.path.exists(textName):
-        print("\n'" + media + "' text file already present")
+    if not useLibrary and os.path.exists(textName):
+        postEvent("info", media, "present", "'" + media + "' text file already present")
         infoScraped[media] = True   # set information scrape status to indicate successful scrape
         posterList[media] = True    # add placeholder to poster cache to indicate possible url in text file
         idList[media] = True        # add placeholder to id cache to indicate possible id in text file
         return
-        
+
+    # Check if media was already scraped with a different name (renamed or re-tagged)
+    knownMedia = getKnownMedia(media)
+    if knownMedia is not None and copyInfo(knownMedia, media, textName):
+        postEvent("info", media, "present", "'" + media + "' information copied from '" + knownMedia + "' (same media)")
+        infoScraped[media] = True   # set information scrape status to indicate successful scrape
+        with titleIndexLock:
+            titleIndex[getCanonicalKey(media)][1] = media   # use new name for later renames
+        return
+
     # Search online for media using the root search url set
-    print("\nSearching '" + media + "'...")
-    searchURL = DATABASE_SEARCH + media
+    postEvent("info", media, "info", "Searching '" + media + "'...")
+    searchURL = DATABASE_SEARCH + getSearchQuery(media)
     try:
-        with startSession() as session:
-            response = session.get(searchURL, timeout = 5)
+        session = startSession()
+        response = session.get(searchURL, timeout = 5)
     except requests.exceptions.RequestException as error:
         #print(error)    # for debug only
-        print("\nCould not get '" + media + "' search url")
+        postEvent("info", media, "failed", "Could not get '" + media + "' search url")
         infoScraped[media] = False  # set information scrape status to indicate failed search request
         posterList[media] = None    # add null placeholder to poster cache
         idList[media] = None        # add null placeholder to id cache
@@ -614,11 +2301,11 @@ def save_info(media):
     
     # check for no results
     if mediaData is None:
-        print("\nNo results found for '" + media + "'")
+        postEvent("info", media, "missing", "No results found for '" + media + "'")
         infoScraped[media] = None   # set information scrape status to indicate no results
         posterList[media] = None    # add null placeholder to poster cache
         idList[media] = None        # add null placeholder to id cache
-        return
+        return True
     
     # Extract relevant data from media data
     mediaID = getID(mediaData)
@@ -634,47 +2321,63 @@ def save_info(media):
     
     posterList[media] = mediaPoster     # add poster url for media to poster cache
     idList[media] = mediaID             # add database id for media to id cache 
+    recordTitle(media, mediaID)         # add database id for media to title index
 
     # combine information for media
-    info = ["Scraped from: " + DATABASE["Name"], "Database ID: " + mediaID,
-            "Title: " + mediaTitle, "Release date: " + mediaYear,
-            "Runtime: " + mediaRuntime, "Genre: " + mediaGenre,
-            "Director: " + mediaDirector, "Cast: " + mediaCast,
-            "Plot summary: " + mediaSynopsis, "Poster link: " + mediaPoster]
-    
+    infoValues = [DATABASE["Name"], mediaID, mediaTitle, mediaYear, mediaRuntime,
+                  mediaGenre, mediaDirector, mediaCast, mediaSynopsis, mediaPoster]
+    info = [field + ": " + value for field, value in zip(INFO_FIELDS, infoValues)]
+
+    # Save information to library file
+    if useLibrary:
+        addLibraryRows({"info": [[media] + infoValues]})
+        libraryInfo[media] = [mediaID, mediaPoster]
+        postEvent("info", media, "done", "Saved '" + media + "' information to library file")
+        infoScraped[media] = True   # set information scrape status to indicate successful scrape
+        return True
+
     # Save information to text file
     try:
         with open(textName, 'w') as file:
             file.write("\n".join(info))
     except OSError as error:
         #print(error)    # for debug only
-        print("Could not save information for '" + media + "'")
+        postEvent("info", media, "failed", "Could not save information for '" + media + "'")
         return
         
-    print("\nSaved '" + media + "' information to '" + textName + "'")
+    postEvent("info", media, "done", "Saved '" + media + "' information to '" + textName + "'")
     infoScraped[media] = True   # set information scrape status to indicate successful scrape
+    return True
     
 
 def save_info_episodes(media):
     '''Scrapes media episode information for all episodes and saves it to a csv file
     Dependant on save_info() - will extract media ID based on idList cache
+    Returns True if episodes were searched online (time taken is added to scrape history)
     '''
     episodesScraped[media] = False  # initialise episodes scrape status
+    postEvent("episodes", media, "start")
 
     tableName = os.path.join(SAVE_FOLDER, media + " episodes.csv")   # csv file path
     textName = os.path.join(SAVE_FOLDER, media + ".txt")             # text file path
 
+    # Check if episode information already in library file
+    if useLibrary and media in libraryEpisodes:
+        postEvent("episodes", media, "present", "'" + media + "' episode info already present in library file")
+        episodesScraped[media] = True     # set episodes scrape status to indicate successful scrape
+        return
+
     # Check if csv file already exists
-    if os.path.exists(tableName):
-        print("\n'" + media + "' episode info already present")
+    if not useLibrary and os.path.exists(tableName):
+        postEvent("episodes", media, "present", "'" + media + "' episode info already present")
         episodesScraped[media] = True     # set episodes scrape status to indicate successful scrape
         return
 
-    print("\nProcessing '" + media + "' episodes...")
+    postEvent("episodes", media, "info", "Processing '" + media + "' episodes...")
         
     # Check for empty media id list cache
     if idList[media] is None:
-        print("\nNo episode info found for '" + media + "'")
+        postEvent("episodes", media, "missing", "No episode info found for '" + media + "'")
         episodesScraped[media] = None     # set episodes scrape status to indicate no results
         return
 
@@ -687,31 +2390,32 @@ def save_info_episodes(media):
         with open(textName) as file:
             info = file.readlines()
             mediaID = info[1].replace("Database ID: ", "").strip()
-            # TODO - add function to verify this is a valid media ID (in case the text file was altered)
+
+        # check media id is valid (in case the text file was altered)
+        if not isValidID(mediaID):
+            mediaID = "Unknown"
 
     # check if no media id found
     if mediaID == "Unknown":
-        print("\nNo episode info found for '" + media + "'")
+        postEvent("episodes", media, "missing", "No episode info found for '" + media + "'")
         episodesScraped[media] = None   # set episodes scrape status to indicate no results
         return    
     
     # Navigate to media episodes page for first season
-    print("\nSearching '" + media + "' season 1...")
+    postEvent("episodes", media, "info", "Searching '" + media + "' season 1...")
     searchURL = DATABASE["TV Root"] + mediaID + DATABASE["TV Episodes"] + "1"
     try:
-        session = startSession()    # use session without context manager to keep it open for reuse
+        session = startSession()    # reuse session for each season page
         response = session.get(searchURL, timeout = 5)
         response.raise_for_status() # check for non existant page (will raise HTTP errors for 4XX, 5XX errors)
     except requests.exceptions.HTTPError as error:
         #print(error)    # for debug only
-        session.close() # close session
-        print("\nNo episode info found for '" + media + "'")
+        postEvent("episodes", media, "missing", "No episode info found for '" + media + "'")
         episodesScraped[media] = None   # set episodes scrape status to indicate no results
-        return
+        return True
     except requests.exceptions.RequestException as error:
         #print(error)    # for debug only
-        session.close() # close failed session
-        print("\nCould not get '" + media + "' episodes url")
+        postEvent("episodes", media, "failed", "Could not get '" + media + "' episodes url")
         episodesScraped[media] = False  # set episodes scrape status to indicate failed search request
         return
 
@@ -726,9 +2430,11 @@ def save_info_episodes(media):
 
     # check for no results
     if mediaSeasons is None or mediaEpisodeData is None:
-        print("\nNo episode info found for '" + media + "'")
+        postEvent("episodes", media, "missing", "No episode info found for '" + media + "'")
         episodesScraped[media] = None   # set episodes scrape status to indicate no results
-        return
+        return True
+
+    recordHistory(media, "Seasons", len(mediaSeasons))  # add number of seasons to scrape history
 
     # initialise dictionary to hold array of episode information (value) for each episode (key)
     episodeInfo = {}
@@ -744,14 +2450,13 @@ def save_info_episodes(media):
         
         # go to next season page and extract html data
         if seasonIndex + 1 < len(mediaSeasons):
-            print("\nSearching '" + media + "' season " + mediaSeasons[seasonIndex+1] + "...")
+            postEvent("episodes", media, "info", "Searching '" + media + "' season " + mediaSeasons[seasonIndex+1] + "...")
             searchURL = DATABASE["TV Root"] + mediaID + DATABASE["TV Episodes"] + mediaSeasons[seasonIndex+1]
             try:
                 response = session.get(searchURL, timeout = 5)
             except requests.exceptions.RequestException as error:
                 #print(error)    # for debug only
-                session.close() # close failed session
-                print("\nCould not get '" + media + "' episodes url")
+                postEvent("episodes", media, "failed", "Could not get '" + media + "' episodes url")
                 episodesScraped[media] = False  # set episodes scrape status to indicate failed search request
                 return
             
@@ -761,48 +2466,69 @@ def save_info_episodes(media):
             # extract html source of episode data from url content for next iteration of loop
             mediaEpisodeData = getEpisodeData(soup)
 
-        # close the session if there are no more season pages to visit
-        else:
-            session.close()
 
+    # Add episode information to episode index
+    if useEpisodeIndex:
+        try:
+            addEpisodeIndex(mediaID, episodeInfo.values())
+        except (OSError, OverflowError, ValueError) as error:
+            #print(error)    # for debug only
+            postEvent("episodes", media, "warning", "Could not add episode information for '" + media + "' to episode index")
+
+    # Save episode information to library file
+    if useLibrary:
+        addLibraryRows({"episodes": [[media] + info for info in episodeInfo.values()],
+                        "episode_lists": [(media,)]})
+        libraryEpisodes.add(media)
+        postEvent("episodes", media, "done", "Saved '" + media + "' episode info to library file")
+        episodesScraped[media] = True     # set episodes scrape status to indicate successful scrape
+        return True
 
     # Save episode information to csv file
     try:
         with open(tableName, 'w', newline = '') as file:
-            fieldnames = ["Season", "Episode", "Title", "Date", "Description"]
             csv_writer = csv.writer(file, delimiter = ',')
-            csv_writer.writerow(fieldnames)
+            csv_writer.writerow(EPISODE_FIELDS)
             for info in episodeInfo.values():
                 csv_writer.writerow(info)
     except OSError as error:
         #print(error)    # for debug only
-        print("Could not save episode information for '" + media + "'")
+        postEvent("episodes", media, "failed", "Could not save episode information for '" + media + "'")
         return
         
-    print("\nSaved '" + media + "' episode info to '" + tableName + "'")
+    postEvent("episodes", media, "done", "Saved '" + media + "' episode info to '" + tableName + "'")
     episodesScraped[media] = True     # set episodes scrape status to indicate successful scrape
+    return True
 
         
 def download_images(media):
     '''Downloads media images (poster) to a jpg file
     Dependant on save_info() - will extract poster URL based on posterList cache
+    Returns True if the poster was downloaded (time taken is added to scrape history)
     '''
     imagesScraped[media] = False    # initialise image scrape status
+    postEvent("images", media, "start")
     
     imageName = os.path.join(SAVE_FOLDER, media + " poster.jpg")   # image file path
     textName = os.path.join(SAVE_FOLDER, media + ".txt")           # text file path
 
+    # Check if image already in library file
+    if useLibrary and media in libraryPosters:
+        postEvent("images", media, "present", "'" + media + "' image already present in library file")
+        imagesScraped[media] = True     # set image scrape status to indicate successful scrape
+        return
+
     # Check if image already exists
-    if os.path.exists(imageName):
-        print("\n'" + media + "' image already present")
+    if not useLibrary and os.path.exists(imageName):
+        postEvent("images", media, "present", "'" + media + "' image already present")
         imagesScraped[media] = True     # set image scrape status to indicate successful scrape
         return
         
-    print("\nProcessing '" + media + "' images...")
+    postEvent("images", media, "info", "Processing '" + media + "' images...")
     
     # Check for empty poster list cache
     if posterList[media] is None:
-        print("\nNo image found for '" + media + "'")
+        postEvent("images", media, "missing", "No image found for '" + media + "'")
         imagesScraped[media] = None     # set image scrape status to indicate no results
         return
 
@@ -815,37 +2541,80 @@ def download_images(media):
         with open(textName) as file:
             info = file.readlines()
             posterURL = info[-1].replace("Poster link: ", "").strip()
-            # TODO - add function to verify this is a valid poster URL (in case the text file was altered)
+
+        # check poster url is valid (in case the text file was altered)
+        if not isValidPosterURL(posterURL):
+            posterURL = "Unknown"
 
     # check if no image url found
     if posterURL == "Unknown":
-        print("\nNo image found for '" + media + "'")
+        postEvent("images", media, "missing", "No image found for '" + media + "'")
         imagesScraped[media] = None     # set image scrape status to indicate no results
         return
         
-    # Search online for image poster using scraped url
-    print("\nSearching for '" + media + "' poster...")
-    try:
-        with startSession() as session:
-            response = session.get(posterURL, timeout = 5)
-    except requests.exceptions.RequestException as error:
-        #print(error)    # for debug only
-        print("\nCould not get '" + media + "' poster url")
-        imagesScraped[media] = False    # set image scrape status to indicate failed search request
-        return
-        
-    # Save image to jpg file
-    print("\nDownloading '" + media + "' poster...")
+    downloaded = False  # poster not downloaded if already in poster store
+
+    # hold lock for poster url so other media with the same poster wait for this download
+    with getPosterLock(posterURL):
+
+        # Check if poster url already downloaded to poster store
+        contentHash = posterHashes.get(posterURL)
+        if contentHash is not None:
+            postEvent("images", media, "info", "'" + media + "' poster already in poster store")
+
+        else:
+            # Search online for image poster using scraped url
+            postEvent("images", media, "info", "Searching for '" + media + "' poster...")
+            try:
+                session = startSession()
+                response = session.get(posterURL, timeout = 5)
+                response.raise_for_status() # check for non existant image (error pages are not saved to poster store)
+            except requests.exceptions.HTTPError as error:
+                #print(error)    # for debug only
+                postEvent("images", media, "missing", "No image found for '" + media + "'")
+                imagesScraped[media] = None     # set image scrape status to indicate no results
+                return True
+            except requests.exceptions.RequestException as error:
+                #print(error)    # for debug only
+                postEvent("images", media, "failed", "Could not get '" + media + "' poster url")
+                imagesScraped[media] = False    # set image scrape status to indicate failed search request
+                return
+            recordHistory(media, "Poster bytes", len(response.content))   # add poster size to scrape history
+
+            # Save image to poster store (identical images are only stored once)
+            postEvent("images", media, "info", "Downloading '" + media + "' poster...")
+            try:
+                if useLibrary:
+                    contentHash = storeLibraryPoster(response.content)
+                    addLibraryRows({"poster_urls": [(posterURL, contentHash)]})
+                else:
+                    contentHash = storePoster(response.content)
+            except OSError as error:
+                #print(error)    # for debug only
+                postEvent("images", media, "failed", "Could not save image for '" + media + "'")
+                return
+            posterHashes[posterURL] = contentHash   # add content hash for poster url to poster store cache
+            downloaded = True
+
+    # Save image to library file
+    if useLibrary:
+        addLibraryRows({"media_posters": [(media, contentHash)]})
+        libraryPosters.add(media)
+        postEvent("images", media, "done", "Saved '" + media + "' poster to library file")
+        imagesScraped[media] = True     # set image scrape status to indicate successful scrape
+        return downloaded
+
+    # Link jpg file to image in poster store
     try:
-        with open(imageName, 'wb') as file:
-            file.write(response.content)
+        linkPoster(contentHash, imageName)
     except OSError as error:
         #print(error)    # for debug only
-        print("Could not save image for '" + media + "'")
+        postEvent("images", media, "failed", "Could not save image for '" + media + "'")
         return
 
-    print("\nSaved '" + media + "' poster to '" + imageName + "'")
+    postEvent("images", media, "done", "Saved '" + media + "' poster to '" + imageName + "'")
     imagesScraped[media] = True     # set image scrape status to indicate successful scrape
+    return downloaded
     
 ####################################################################################################
 ### Run WebScrape Program ###
@@ -888,6 +2657,9 @@ def checkHelp():
 
 
 if __name__ == "__main__":
+    # import scraping libraries in the background while waiting for user input
+    threading.Thread(target = importScrapingLibraries, daemon = True).start()
+
     print(f"\n\t{'*'*36}\n\t* Welcome to zman's media scraper! *\n\t{'*'*36}\n")
     checkHelp()
     main()